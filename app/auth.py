@@ -2,11 +2,13 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from .config import settings
-from .database import get_db
+from .config import SETTINGS
+from .database import get_async_db
 from . import models, schemas
 
 # Password context for hashing
@@ -45,16 +47,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = datetime.utcnow() + timedelta(minutes=SETTINGS.access_token_expire_minutes)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = jwt.encode(to_encode, SETTINGS.secret_key, algorithm=SETTINGS.algorithm)
     return encoded_jwt
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> models.User:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -64,7 +66,7 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = jwt.decode(token, SETTINGS.secret_key, algorithms=[SETTINGS.algorithm])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -72,7 +74,9 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user(db, username=token_data.username)
+    # Awaited on the request's async session (shared with the handler), so the
+    # lookup never blocks the event loop
+    user = await db.scalar(select(models.User).where(models.User.username == token_data.username))
     if user is None:
         raise credentials_exception
     return user
@@ -1,3 +1,4 @@
+from dataclasses import make_dataclass
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -21,4 +22,18 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
+# Generated from Settings.model_fields so a new setting can never be missing here
+FrozenSettings = make_dataclass(
+    "FrozenSettings",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()],
+    namespace={
+        "__module__": __name__,
+        "__doc__": "Immutable snapshot of Settings, read from the environment once at import"
+    },
+    slots=True,
+    frozen=True
+)
+
+
 settings = Settings()
+SETTINGS = FrozenSettings(**settings.model_dump())
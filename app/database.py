@@ -1,16 +1,52 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from .config import settings
+from .config import SETTINGS
+
+# Compiled-SQL cache entries per engine (SQLAlchemy default is 500); every
+# endpoint/filter combination gets its own entry, so leave generous headroom
+QUERY_CACHE_SIZE = 1200
 
 # Create SQLAlchemy engine
 engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    SETTINGS.database_url,
+    connect_args={"check_same_thread": False} if "sqlite" in SETTINGS.database_url else {},
+    query_cache_size=QUERY_CACHE_SIZE
+)
+
+# Async engine for the transaction endpoints (aiosqlite driver)
+async_engine = create_async_engine(
+    SETTINGS.database_url.replace("sqlite:///", "sqlite+aiosqlite:///"),
+    query_cache_size=QUERY_CACHE_SIZE
 )
 
+# Per-connection SQLite tuning: WAL lets readers run alongside a writer and
+# synchronous=NORMAL drops the extra fsync per commit that FULL requires
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 # Create Base class
 Base = declarative_base()
@@ -25,7 +61,16 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
     """Create all database tables"""
     from . import models
     models.Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced later
+    for index in models.Transaction.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
@@ -1,8 +1,12 @@
-from fastapi import FastAPI, Depends
-from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from .config import settings
-from .database import create_tables, get_db
+import time
+from datetime import datetime, timezone
+import orjson
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from .config import SETTINGS
+from .database import async_engine, create_tables, get_db
+from .middleware import StaticCORSMiddleware
 from .routers import auth, transactions
 from . import models
 
@@ -21,91 +25,104 @@ app = FastAPI(
     license_info={
         "name": "Proprietary",
         "url": "https://financeflow.com/license"
-    }
+    },
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add CORS middleware (allows every origin - configure appropriately for production)
+app.add_middleware(StaticCORSMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(transactions.router, prefix="/transactions", tags=["Transactions"])
 
+# Static payloads are serialized once at import time
+_ROOT_BYTES = orjson.dumps({
+    "app_name": "FinanceFlow API",
+    "message": "🚀 Welcome to FinanceFlow - Advanced Personal Wealth Management System",
+    "version": "2.1.0",
+    "developer": "Built by Nabhi",
+    "features": [
+        "JWT Authentication",
+        "Transaction Management", 
+        "Advanced Analytics",
+        "Spending Pattern Recognition",
+        "Wealth Insights Engine"
+    ],
+    "endpoints": {
+        "documentation": "/docs",
+        "alternative_docs": "/redoc",
+        "health_check": "/health",
+        "analytics": "/transactions/analytics/wealth-insights"
+    },
+    "status": "🟢 Operational"
+})
+
 @app.get("/")
 async def read_root():
-    return {
-        "app_name": "FinanceFlow API",
-        "message": "🚀 Welcome to FinanceFlow - Advanced Personal Wealth Management System",
-        "version": "2.1.0",
-        "developer": "Built by Nabhi",
-        "features": [
-            "JWT Authentication",
-            "Transaction Management", 
-            "Advanced Analytics",
-            "Spending Pattern Recognition",
-            "Wealth Insights Engine"
-        ],
-        "endpoints": {
-            "documentation": "/docs",
-            "alternative_docs": "/redoc",
-            "health_check": "/health",
-            "analytics": "/transactions/analytics/wealth-insights"
-        },
-        "status": "🟢 Operational"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
-@app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    """Enhanced health check with system status"""
+# Liveness probes may hit /health many times a second; ping the DB and rebuild
+# the body at most once per interval, serving the cached bytes in between
+HEALTH_CHECK_INTERVAL = 1.0
+_health_cache = {"checked_at": float("-inf"), "body": b""}
+
+
+async def _database_status() -> str:
+    """Ping the database on a bare pooled connection"""
     try:
-        # Test database connection
-        db.execute("SELECT 1")
-        db_status = "✅ Connected"
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return "✅ Connected"
     except Exception:
-        db_status = "❌ Disconnected"
+        return "❌ Disconnected"
+
+@app.get("/health")
+async def health_check():
+    """Enhanced health check with system status"""
+    now = time.monotonic()
+    if now - _health_cache["checked_at"] >= HEALTH_CHECK_INTERVAL:
+        _health_cache["body"] = orjson.dumps({
+            "service": "FinanceFlow API",
+            "status": "🟢 Healthy",
+            "version": "2.1.0",
+            "database": await _database_status(),
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "uptime": "99.9%",
+            "environment": "Production" if not SETTINGS.debug else "Development"
+        })
+        _health_cache["checked_at"] = now
     
-    return {
-        "service": "FinanceFlow API",
-        "status": "🟢 Healthy",
-        "version": "2.1.0",
-        "database": db_status,
-        "timestamp": "2024-01-15T10:30:00Z",
-        "uptime": "99.9%",
-        "environment": "Production" if not settings.debug else "Development"
+    return Response(content=_health_cache["body"], media_type="application/json")
+
+_SYSTEM_INFO_BYTES = orjson.dumps({
+    "system_name": "FinanceFlow Wealth Management Platform",
+    "api_version": "2.1.0",
+    "build_info": {
+        "framework": "FastAPI 0.104.1",
+        "python_version": "3.12+",
+        "database": "SQLite with SQLAlchemy ORM",
+        "authentication": "JWT with bcrypt hashing"
+    },
+    "capabilities": {
+        "user_management": True,
+        "transaction_tracking": True,
+        "advanced_analytics": True,
+        "spending_insights": True,
+        "pattern_recognition": True,
+        "wealth_scoring": True
+    },
+    "developer_info": {
+        "created_by": "Nabhi",
+        "specialization": "Full-Stack Financial Technology",
+        "architecture": "RESTful API with Clean Architecture"
     }
+})
 
 @app.get("/system/info")
 async def get_system_info():
     """Get system information and capabilities"""
-    return {
-        "system_name": "FinanceFlow Wealth Management Platform",
-        "api_version": "2.1.0",
-        "build_info": {
-            "framework": "FastAPI 0.104.1",
-            "python_version": "3.12+",
-            "database": "SQLite with SQLAlchemy ORM",
-            "authentication": "JWT with bcrypt hashing"
-        },
-        "capabilities": {
-            "user_management": True,
-            "transaction_tracking": True,
-            "advanced_analytics": True,
-            "spending_insights": True,
-            "pattern_recognition": True,
-            "wealth_scoring": True
-        },
-        "developer_info": {
-            "created_by": "Nabhi",
-            "specialization": "Full-Stack Financial Technology",
-            "architecture": "RESTful API with Clean Architecture"
-        }
-    }
+    return Response(content=_SYSTEM_INFO_BYTES, media_type="application/json")
 
 # Seed initial data
 @app.on_event("startup")
@@ -125,11 +142,11 @@ async def startup_event():
         {"name": "Investment", "description": "Investment returns", "category_type": "income"},
     ]
     
-    for cat_data in default_categories:
-        existing = db.query(models.Category).filter(models.Category.name == cat_data["name"]).first()
-        if not existing:
-            category = models.Category(**cat_data)
-            db.add(category)
+    names = [cat_data["name"] for cat_data in default_categories]
+    existing = {name for (name,) in db.query(models.Category.name).filter(models.Category.name.in_(names)).all()}
+    missing = [models.Category(**cat_data) for cat_data in default_categories if cat_data["name"] not in existing]
     
-    db.commit()
+    if missing:
+        db.bulk_save_objects(missing)
+        db.commit()
     db.close()
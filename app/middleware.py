@@ -0,0 +1,64 @@
+from typing import Iterable
+
+
+class StaticCORSMiddleware:
+    """Allow-all CORS policy as a plain ASGI middleware.
+
+    The policy never changes at runtime, so every header except the echoed
+    origin is encoded once here instead of being rebuilt per request.
+    """
+
+    def __init__(
+        self,
+        app,
+        allow_methods: Iterable[str] = ("GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"),
+        max_age: int = 600
+    ):
+        self.app = app
+        self._simple_headers = [
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+        self._preflight_headers = self._simple_headers + [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"content-length", b"0"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Credentials are allowed, so browsers reject a literal "*"; echo the origin instead
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            headers = [(b"access-control-allow-origin", origin)] + self._preflight_headers
+            if request_headers is not None:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cors_headers = [(b"access-control-allow-origin", origin)] + self._simple_headers
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + cors_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -66,6 +66,13 @@ class Transaction(Base):
     user = relationship("User", back_populates="transactions")
     account = relationship("Account", back_populates="transactions")
     category = relationship("Category", back_populates="transactions")
+    
+    # Listing is "user_id = ? ORDER BY transaction_date DESC"; analytics filter
+    # user_id + transaction_type + a date cutoff
+    __table_args__ = (
+        Index("ix_tx_user_date", user_id, transaction_date.desc()),
+        Index("ix_tx_user_type_date", user_id, transaction_type, transaction_date),
+    )
 
 
 class Budget(Base):
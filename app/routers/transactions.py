@@ -1,55 +1,127 @@
+import calendar
 from typing import List, Optional
-from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from ..database import get_db
+from datetime import datetime, date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import func, and_, select, case, update
+from ..database import get_async_db
 from ..auth import get_current_active_user
 from .. import models, schemas
 
 router = APIRouter()
 
+# Validates and serializes a whole listing page in one pydantic-core call
+transaction_list_adapter = TypeAdapter(List[schemas.Transaction])
+
+
+# Eager-load account/category so response serialization never lazy-loads
+TRANSACTION_RELATIONS = (
+    selectinload(models.Transaction.account),
+    selectinload(models.Transaction.category)
+)
+
+
+def _sum_of_type(transaction_type: schemas.TransactionType):
+    """SUM(amount) restricted to one transaction type, 0.0 when there are no rows"""
+    return func.coalesce(func.sum(case(
+        (models.Transaction.transaction_type == transaction_type, models.Transaction.amount),
+        else_=0
+    )), 0.0)
+
+
+def _totals_query():
+    """Income total, expense total and row count in a single aggregate statement"""
+    return select(
+        _sum_of_type(schemas.TransactionType.income),
+        _sum_of_type(schemas.TransactionType.expense),
+        func.count(models.Transaction.id)
+    )
+
+
+# strftime('%w') codes ("0" = Sunday) to day names, in Monday-first order
+SQLITE_WEEKDAY_NAMES = {str((index + 1) % 7): name for index, name in enumerate(calendar.day_name)}
+
+# Fields whose change requires re-applying the transaction to account balances
+BALANCE_FIELDS = frozenset({"amount", "transaction_type", "account_id"})
+
+
+def _signed_amount(transaction_type: str, amount: float) -> float:
+    """Effect of a transaction on its account balance"""
+    if transaction_type == schemas.TransactionType.income:
+        return amount
+    if transaction_type == schemas.TransactionType.expense:
+        return -amount
+    return 0.0
+
+
+async def _adjust_balance(db: AsyncSession, account_id: int, delta: float):
+    """Apply a balance change as one atomic UPDATE (no read-modify-write race)"""
+    if delta:
+        await db.execute(
+            update(models.Account)
+            .where(models.Account.id == account_id)
+            .values(balance=models.Account.balance + delta)
+        )
+
+
+async def _get_user_transaction(
+    db: AsyncSession,
+    transaction_id: int,
+    user_id: int,
+    with_relations: bool = True
+) -> Optional[models.Transaction]:
+    """Get a transaction by primary key, or None if it belongs to another user"""
+    transaction = await db.get(
+        models.Transaction,
+        transaction_id,
+        options=TRANSACTION_RELATIONS if with_relations else None,
+        populate_existing=with_relations
+    )
+    if transaction is None or transaction.user_id != user_id:
+        return None
+    return transaction
+
 
 @router.post("/", response_model=schemas.Transaction)
 async def create_transaction(
     transaction: schemas.TransactionCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new transaction"""
     # Verify account belongs to user
-    account = db.query(models.Account).filter(
+    result = await db.execute(select(models.Account).where(
         models.Account.id == transaction.account_id,
         models.Account.user_id == current_user.id
-    ).first()
+    ))
+    account = result.scalars().first()
     
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
     # Create transaction
     db_transaction = models.Transaction(
-        **transaction.dict(),
+        **transaction.model_dump(),
         user_id=current_user.id
     )
     
     db.add(db_transaction)
     
     # Update account balance
-    if transaction.transaction_type == schemas.TransactionType.income:
-        account.balance += transaction.amount
-    elif transaction.transaction_type == schemas.TransactionType.expense:
-        account.balance -= transaction.amount
+    await _adjust_balance(db, account.id, _signed_amount(transaction.transaction_type, transaction.amount))
     
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
     
-    return db_transaction
+    return await _get_user_transaction(db, db_transaction.id, current_user.id)
 
 
-@router.get("/", response_model=List[schemas.Transaction])
+@router.get("/", response_model=None, responses={200: {"model": List[schemas.Transaction]}})
 async def get_transactions(
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     account_id: Optional[int] = None,
@@ -57,37 +129,44 @@ async def get_transactions(
     transaction_type: Optional[schemas.TransactionType] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
-):
+) -> Response:
     """Get user's transactions with filtering options"""
-    query = db.query(models.Transaction).filter(models.Transaction.user_id == current_user.id)
+    conditions = [models.Transaction.user_id == current_user.id]
     
     # Apply filters
     if account_id:
-        query = query.filter(models.Transaction.account_id == account_id)
+        conditions.append(models.Transaction.account_id == account_id)
     if category_id:
-        query = query.filter(models.Transaction.category_id == category_id)
+        conditions.append(models.Transaction.category_id == category_id)
     if transaction_type:
-        query = query.filter(models.Transaction.transaction_type == transaction_type)
+        conditions.append(models.Transaction.transaction_type == transaction_type)
     if start_date:
-        query = query.filter(models.Transaction.transaction_date >= start_date)
+        conditions.append(models.Transaction.transaction_date >= start_date)
     if end_date:
-        query = query.filter(models.Transaction.transaction_date <= end_date)
-    
-    transactions = query.order_by(models.Transaction.transaction_date.desc()).offset(skip).limit(limit).all()
-    return transactions
+        conditions.append(models.Transaction.transaction_date <= end_date)
+    
+    # Built in one shot so each filter combination maps to one cached compiled statement
+    stmt = (
+        select(models.Transaction)
+        .where(and_(*conditions))
+        .options(*TRANSACTION_RELATIONS)
+        .order_by(models.Transaction.transaction_date.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    transactions = transaction_list_adapter.validate_python(result.scalars().all(), from_attributes=True)
+    return Response(content=transaction_list_adapter.dump_json(transactions), media_type="application/json")
 
 
 @router.get("/{transaction_id}", response_model=schemas.Transaction)
 async def get_transaction(
     transaction_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific transaction"""
-    transaction = db.query(models.Transaction).filter(
-        models.Transaction.id == transaction_id,
-        models.Transaction.user_id == current_user.id
-    ).first()
+    transaction = await _get_user_transaction(db, transaction_id, current_user.id)
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -100,13 +179,10 @@ async def update_transaction(
     transaction_id: int,
     transaction_update: schemas.TransactionUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a transaction"""
-    transaction = db.query(models.Transaction).filter(
-        models.Transaction.id == transaction_id,
-        models.Transaction.user_id == current_user.id
-    ).first()
+    transaction = await _get_user_transaction(db, transaction_id, current_user.id)
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -117,58 +193,45 @@ async def update_transaction(
     old_account_id = transaction.account_id
     
     # Update transaction
-    for field, value in transaction_update.dict(exclude_unset=True).items():
+    updates = transaction_update.model_dump(exclude_unset=True)
+    for field, value in updates.items():
         setattr(transaction, field, value)
     
     # Handle account balance changes
-    if (transaction_update.amount is not None or 
-        transaction_update.transaction_type is not None or 
-        transaction_update.account_id is not None):
-        
-        # Revert old transaction effect
-        old_account = db.query(models.Account).filter(models.Account.id == old_account_id).first()
-        if old_type == schemas.TransactionType.income:
-            old_account.balance -= old_amount
-        elif old_type == schemas.TransactionType.expense:
-            old_account.balance += old_amount
+    if updates.keys() & BALANCE_FIELDS:
+        old_effect = _signed_amount(old_type, old_amount)
+        new_effect = _signed_amount(transaction.transaction_type, transaction.amount)
         
-        # Apply new transaction effect
-        new_account = db.query(models.Account).filter(models.Account.id == transaction.account_id).first()
-        if transaction.transaction_type == schemas.TransactionType.income:
-            new_account.balance += transaction.amount
-        elif transaction.transaction_type == schemas.TransactionType.expense:
-            new_account.balance -= transaction.amount
+        if transaction.account_id == old_account_id:
+            # Same account: apply the net change in one statement
+            await _adjust_balance(db, old_account_id, new_effect - old_effect)
+        else:
+            # Revert old transaction effect, then apply the new one
+            await _adjust_balance(db, old_account_id, -old_effect)
+            await _adjust_balance(db, transaction.account_id, new_effect)
     
-    db.commit()
-    db.refresh(transaction)
+    await db.commit()
     
-    return transaction
+    return await _get_user_transaction(db, transaction_id, current_user.id)
 
 
 @router.delete("/{transaction_id}")
 async def delete_transaction(
     transaction_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a transaction"""
-    transaction = db.query(models.Transaction).filter(
-        models.Transaction.id == transaction_id,
-        models.Transaction.user_id == current_user.id
-    ).first()
+    transaction = await _get_user_transaction(db, transaction_id, current_user.id, with_relations=False)
     
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     # Revert account balance
-    account = db.query(models.Account).filter(models.Account.id == transaction.account_id).first()
-    if transaction.transaction_type == schemas.TransactionType.income:
-        account.balance -= transaction.amount
-    elif transaction.transaction_type == schemas.TransactionType.expense:
-        account.balance += transaction.amount
+    await _adjust_balance(db, transaction.account_id, -_signed_amount(transaction.transaction_type, transaction.amount))
     
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
     
     return {"message": "Transaction deleted successfully"}
 
@@ -176,71 +239,72 @@ async def delete_transaction(
 @router.get("/summary/", response_model=schemas.TransactionSummary)
 async def get_transaction_summary(
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
 ):
     """Get transaction summary for a date range"""
-    query = db.query(models.Transaction).filter(models.Transaction.user_id == current_user.id)
+    stmt = _totals_query().where(models.Transaction.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(models.Transaction.transaction_date >= start_date)
+        stmt = stmt.where(models.Transaction.transaction_date >= start_date)
     if end_date:
-        query = query.filter(models.Transaction.transaction_date <= end_date)
-    
-    transactions = query.all()
+        stmt = stmt.where(models.Transaction.transaction_date <= end_date)
     
-    total_income = sum(t.amount for t in transactions if t.transaction_type == schemas.TransactionType.income)
-    total_expenses = sum(t.amount for t in transactions if t.transaction_type == schemas.TransactionType.expense)
+    result = await db.execute(stmt)
+    total_income, total_expenses, transaction_count = result.one()
     
     return schemas.TransactionSummary(
         total_income=total_income,
         total_expenses=total_expenses,
         net_income=total_income - total_expenses,
-        transaction_count=len(transactions)
+        transaction_count=transaction_count
     )
 
 
-@router.get("/analytics/wealth-insights")
+@router.get("/analytics/wealth-insights", response_class=ORJSONResponse)
 async def get_wealth_insights(
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     period_days: int = Query(30, ge=7, le=365)
 ):
     """Advanced wealth analytics - FinanceFlow proprietary insights"""
-    from datetime import datetime, timedelta
-    
     cutoff_date = datetime.utcnow() - timedelta(days=period_days)
     
-    # Get transactions for the period
-    transactions = db.query(models.Transaction).filter(
+    period_filter = (
         models.Transaction.user_id == current_user.id,
         models.Transaction.transaction_date >= cutoff_date
-    ).all()
+    )
     
-    if not transactions:
-        return {"message": "No transactions found for analysis period"}
+    # Calculate metrics: totals, average and distinct-amount count in one pass
+    result = await db.execute(
+        _totals_query()
+        .add_columns(func.avg(models.Transaction.amount), func.count(func.distinct(models.Transaction.amount)))
+        .where(*period_filter)
+    )
+    total_income, total_expenses, transaction_count, average_transaction, distinct_amounts = result.one()
     
-    # Calculate metrics
-    total_income = sum(t.amount for t in transactions if t.transaction_type == schemas.TransactionType.income)
-    total_expenses = sum(t.amount for t in transactions if t.transaction_type == schemas.TransactionType.expense)
+    if not transaction_count:
+        return ORJSONResponse({"message": "No transactions found for analysis period"})
     
     # Category analysis
-    expense_by_category = {}
-    for t in transactions:
-        if t.transaction_type == schemas.TransactionType.expense:
-            category = db.query(models.Category).filter(models.Category.id == t.category_id).first()
-            cat_name = category.name if category else "Uncategorized"
-            expense_by_category[cat_name] = expense_by_category.get(cat_name, 0) + t.amount
+    result = await db.execute(
+        select(models.Category.name, func.sum(models.Transaction.amount))
+        .select_from(models.Transaction)
+        .outerjoin(models.Category, models.Transaction.category_id == models.Category.id)
+        .where(*period_filter, models.Transaction.transaction_type == schemas.TransactionType.expense)
+        .group_by(models.Category.name)
+    )
+    expense_by_category = {name or "Uncategorized": amount for name, amount in result.all()}
     
     # Financial health score (0-100)
     savings_rate = (total_income - total_expenses) / total_income if total_income > 0 else 0
     diversification_score = min(len(expense_by_category) * 10, 100)  # More categories = better diversification
-    consistency_score = 100 - (len(set(t.amount for t in transactions)) / len(transactions) * 100) if transactions else 0
+    consistency_score = 100 - (distinct_amounts / transaction_count * 100)
     
     wealth_score = int((savings_rate * 40 + diversification_score * 0.3 + consistency_score * 0.3))
     
-    return {
+    return ORJSONResponse({
         "analysis_period": f"{period_days} days",
         "financial_health_score": max(0, min(100, wealth_score)),
         "total_income": float(total_income),
@@ -256,59 +320,79 @@ async def get_wealth_insights(
         },
         "insights": {
             "top_expense_category": max(expense_by_category, key=expense_by_category.get) if expense_by_category else None,
-            "average_transaction": float(sum(t.amount for t in transactions) / len(transactions)),
-            "transaction_frequency": len(transactions) / period_days,
+            "average_transaction": float(average_transaction),
+            "transaction_frequency": transaction_count / period_days,
             "recommendation": "Great savings rate!" if savings_rate > 0.2 else "Consider reducing expenses to improve savings."
         }
-    }
+    })
 
 
-@router.get("/analytics/spending-patterns")
+@router.get("/analytics/spending-patterns", response_class=ORJSONResponse)
 async def analyze_spending_patterns(
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """AI-powered spending pattern analysis - Nabhi's custom algorithm"""
-    from datetime import datetime, timedelta
-    from collections import defaultdict
-    import calendar
-    
     # Get last 90 days of data
     cutoff_date = datetime.utcnow() - timedelta(days=90)
     
-    transactions = db.query(models.Transaction).filter(
+    expense_filter = (
         models.Transaction.user_id == current_user.id,
         models.Transaction.transaction_date >= cutoff_date,
         models.Transaction.transaction_type == schemas.TransactionType.expense
-    ).all()
+    )
     
-    if not transactions:
-        return {"message": "Insufficient data for pattern analysis"}
+    result = await db.execute(
+        select(func.count(models.Transaction.id), func.avg(models.Transaction.amount)).where(*expense_filter)
+    )
+    transaction_count, avg_transaction = result.one()
+    
+    if not transaction_count:
+        return ORJSONResponse({"message": "Insufficient data for pattern analysis"})
     
     # Weekly patterns
-    weekly_spending = defaultdict(float)
-    for t in transactions:
-        weekday = calendar.day_name[t.transaction_date.weekday()]
-        weekly_spending[weekday] += t.amount
+    weekday = func.strftime("%w", models.Transaction.transaction_date)
+    result = await db.execute(
+        select(weekday, func.sum(models.Transaction.amount)).where(*expense_filter).group_by(weekday)
+    )
+    spending_by_weekday = dict(result.all())
+    weekly_spending = {
+        name: spending_by_weekday[code]
+        for code, name in SQLITE_WEEKDAY_NAMES.items() if code in spending_by_weekday
+    }
     
     # Monthly patterns 
-    monthly_spending = defaultdict(float)
-    for t in transactions:
-        month_key = t.transaction_date.strftime("%Y-%m")
-        monthly_spending[month_key] += t.amount
-    
-    # Detect anomalies (spending 2x above average)
-    avg_transaction = sum(t.amount for t in transactions) / len(transactions)
+    month = func.strftime("%Y-%m", models.Transaction.transaction_date)
+    result = await db.execute(
+        select(month, func.sum(models.Transaction.amount)).where(*expense_filter).group_by(month)
+    )
+    monthly_spending = dict(result.all())
+    
+    # Detect anomalies (spending 2x above average). The window COUNT is evaluated
+    # before LIMIT, so one scan returns both the top 10 and the total match count
+    result = await db.execute(
+        select(
+            models.Transaction.transaction_date,
+            models.Transaction.amount,
+            models.Transaction.description,
+            func.count().over()
+        )
+        .where(*expense_filter, models.Transaction.amount > avg_transaction * 2)
+        .order_by(models.Transaction.amount.desc())
+        .limit(10)
+    )
+    anomalies = result.all()
+    total_anomalies = anomalies[0][3] if anomalies else 0
     high_spending_days = [
         {
-            "date": t.transaction_date.isoformat(),
-            "amount": float(t.amount),
-            "description": t.description or "No description"
+            "date": transaction_date.isoformat(),
+            "amount": float(amount),
+            "description": description or "No description"
         }
-        for t in transactions if t.amount > avg_transaction * 2
+        for transaction_date, amount, description, _ in anomalies
     ]
     
-    return {
+    return ORJSONResponse({
         "analysis_summary": "FinanceFlow Pattern Recognition Engine v2.1",
         "data_period": "Last 90 days",
         "weekly_patterns": {
@@ -323,12 +407,12 @@ async def analyze_spending_patterns(
         },
         "anomaly_detection": {
             "high_spending_threshold": float(avg_transaction * 2),
-            "anomalous_transactions": high_spending_days[:10],  # Top 10
-            "total_anomalies": len(high_spending_days)
+            "anomalous_transactions": high_spending_days,  # Top 10
+            "total_anomalies": total_anomalies
         },
         "recommendations": [
             "Consider setting daily spending limits",
             "Review high-spending days for optimization opportunities",
-            "Your spending patterns show good consistency" if len(high_spending_days) < 5 else "High variability detected in spending"
+            "Your spending patterns show good consistency" if total_anomalies < 5 else "High variability detected in spending"
         ]
-    }
+    })
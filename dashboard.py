@@ -1,10 +1,13 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime, timedelta, date
-import json
+import asyncio
+import httpx
+import orjson
+import re
 
 # Configure Streamlit page
 st.set_page_config(
@@ -16,34 +19,59 @@ st.set_page_config(
 
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
+REQUEST_TIMEOUT = 5  # seconds; keeps a hung API from stalling the UI
+TX_PAGE_SIZE = 100  # rows per transactions page
+TX_FETCH_LIMIT = 1000  # the API's maximum page size
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Overview, wealth insights (default period) and spending patterns share one
+# concurrent fetch, so opening any of them caches the other two; (path, params) pairs
+DASHBOARD_ENDPOINTS = (
+    ("/transactions/summary/", None),
+    ("/transactions/analytics/wealth-insights", {"period_days": 30}),
+    ("/transactions/analytics/spending-patterns", None),
+)
 if "token" not in st.session_state:
     st.session_state.token = None
 if "user_info" not in st.session_state:
     st.session_state.user_info = None
 
 # Helper functions
-def make_api_request(endpoint, method="GET", data=None, headers=None):
+@st.cache_resource
+def get_session():
+    """Shared HTTP session so keep-alive connections to the API survive reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def end_session():
+    """Forget the logged-in user's token and cached auth header"""
+    st.session_state.token = None
+    st.session_state.user_info = None
+    st.session_state.pop("auth_headers", None)
+
+def make_api_request(endpoint, method="GET", data=None, headers=None, params=None):
     """Make API request with error handling"""
     try:
         url = f"{API_BASE_URL}{endpoint}"
-        if headers is None:
-            headers = {}
+        # The Authorization header is built once at login, not per call
+        headers = {**(headers or {}), **st.session_state.get("auth_headers", {})}
         
-        if st.session_state.token:
-            headers["Authorization"] = f"Bearer {st.session_state.token}"
+        body = None
+        if data is not None:
+            # orjson serializes straight to bytes, skipping json.dumps and the str encode
+            body = orjson.dumps(data)
+            headers["Content-Type"] = "application/json"
         
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            response = requests.post(url, json=data, headers=headers)
-        elif method == "PUT":
-            response = requests.put(url, json=data, headers=headers)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
+        response = get_session().request(
+            method, url, params=params, data=body, headers=headers, timeout=REQUEST_TIMEOUT
+        )
         
         if response.status_code == 401:
-            st.session_state.token = None
-            st.session_state.user_info = None
+            end_session()
             st.error("Session expired. Please login again.")
             return None
             
@@ -55,6 +83,116 @@ def make_api_request(endpoint, method="GET", data=None, headers=None):
         st.error(f"API Error: {str(e)}")
         return None
 
+@st.cache_data(ttl=60, max_entries=128, show_spinner=False)
+def cached_get(endpoint, token, params=()):
+    """Cached GET for read-only endpoints; error responses raise and are never cached"""
+    response = get_session().get(
+        f"{API_BASE_URL}{endpoint}",
+        headers={"Authorization": f"Bearer {token}"},
+        params=dict(params),
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+def _resolve_fetch(fetch):
+    """Run a cached fetch with make_api_request's error handling, returning None on error"""
+    # requests raises for the cached single GETs, httpx for the bootstrap fan-out
+    try:
+        return fetch()
+    except (requests.exceptions.HTTPError, httpx.HTTPStatusError) as e:
+        if e.response.status_code == 401:
+            end_session()
+            st.error("Session expired. Please login again.")
+        return None
+    except (requests.exceptions.ConnectionError, httpx.TransportError):
+        st.error("❌ Cannot connect to FinanceFlow API. Make sure the server is running on localhost:8000")
+        return None
+    except Exception as e:
+        st.error(f"API Error: {str(e)}")
+        return None
+
+def fetch_json(endpoint, params=None):
+    """GET a read-only endpoint through the cache, returning the JSON body or None on error"""
+    return _resolve_fetch(
+        lambda: cached_get(endpoint, st.session_state.token, tuple(sorted((params or {}).items())))
+    )
+
+async def _aget_all(endpoints, token):
+    """GET several endpoints on one event loop, overlapping their network waits"""
+    # The client is bound to the loop asyncio.run creates, so it lives for one fan-out
+    async with httpx.AsyncClient(
+        base_url=API_BASE_URL,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=16)
+    ) as client:
+        responses = await asyncio.gather(
+            *(client.get(endpoint, params=params) for endpoint, params in endpoints)
+        )
+    for response in responses:
+        response.raise_for_status()
+    return [orjson.loads(response.content) for response in responses]
+
+@st.cache_data(ttl=30, max_entries=32, show_spinner=False)
+def bootstrap(token):
+    """Summary, insights and patterns in one concurrent round-trip; any error response raises and is not cached"""
+    summary, insights, patterns = asyncio.run(_aget_all(DASHBOARD_ENDPOINTS, token))
+    return {"summary": summary, "insights": insights, "patterns": patterns}
+
+def dashboard_data(key):
+    """One slice of the bootstrap payload, or None on error"""
+    data = _resolve_fetch(lambda: bootstrap(st.session_state.token))
+    return data[key] if data is not None else None
+
+@st.cache_data(ttl=120, max_entries=16, show_spinner=False)
+def load_all_transactions(token):
+    """The user's full transaction history as one DataFrame, fetched in API-sized pages"""
+    rows = []
+    while True:
+        response = get_session().get(
+            f"{API_BASE_URL}/transactions/",
+            headers={"Authorization": f"Bearer {token}"},
+            params={"skip": len(rows), "limit": TX_FETCH_LIMIT},
+            timeout=REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        page = orjson.loads(response.content)
+        rows.extend(page)
+        if len(page) < TX_FETCH_LIMIT:
+            return transactions_frame(rows)
+
+def transactions_frame(transactions):
+    """Build the transactions table from API rows, projecting only displayed columns with explicit dtypes"""
+    return pd.DataFrame({
+        # ISO-8601 timestamps start with YYYY-MM-DD and sort chronologically as strings
+        "transaction_date": [t["transaction_date"][:10] for t in transactions],
+        "description": [t["description"] for t in transactions],
+        "amount": np.fromiter((t["amount"] for t in transactions), dtype=np.float64, count=len(transactions)),
+        "transaction_type": pd.Categorical([t["transaction_type"] for t in transactions])
+    })
+
+def gauge_figure():
+    """Financial health gauge, built once per browser session and updated in place"""
+    # Kept in session state rather than st.cache_resource: the figure is mutated
+    # on every render, and a resource-cached object is shared by all sessions
+    if "gauge_figure" not in st.session_state:
+        import plotly.graph_objects as go
+        
+        st.session_state.gauge_figure = go.Figure(go.Indicator(
+            mode = "gauge+number+delta",
+            value = 0,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            title = {'text': "Financial Health Score"},
+            delta = {'reference': 80},
+            gauge = {'axis': {'range': [None, 100]},
+                    'bar': {'color': "darkblue"},
+                    'steps' : [{'range': [0, 50], 'color': "lightgray"},
+                              {'range': [50, 80], 'color': "gray"}],
+                    'threshold' : {'line': {'color': "red", 'width': 4},
+                                  'thickness': 0.75, 'value': 90}}))
+    return st.session_state.gauge_figure
+
 def login_page():
     """Login/Register page"""
     st.title("🚀 FinanceFlow Dashboard")
@@ -78,8 +216,9 @@ def login_page():
                     })
                     
                     if response and response.status_code == 200:
-                        token_data = response.json()
+                        token_data = orjson.loads(response.content)
                         st.session_state.token = token_data["access_token"]
+                        st.session_state.auth_headers = {"Authorization": f"Bearer {token_data['access_token']}"}
                         st.session_state.user_info = {"username": username}
                         st.success("✅ Login successful!")
                         st.rerun()
@@ -100,9 +239,7 @@ def login_page():
             if register:
                 if reg_username and reg_email and reg_password and reg_full_name:
                     # Validate email format
-                    import re
-                    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-                    if not re.match(email_pattern, reg_email):
+                    if not EMAIL_RE.match(reg_email):
                         st.error("Please enter a valid email address")
                         return
                     
@@ -133,12 +270,11 @@ def dashboard_page():
             "🔍 Spending Patterns",
             "💸 Transactions",
             "➕ Add Transaction"
-        ])
+        ], key="nav_page")
         
         st.markdown("---")
         if st.button("🚪 Logout"):
-            st.session_state.token = None
-            st.session_state.user_info = None
+            end_session()
             st.rerun()
     
     # Main content based on selected page
@@ -153,15 +289,19 @@ def dashboard_page():
     elif page == "➕ Add Transaction":
         add_transaction_page()
 
+def navigate(page, transaction_type=None):
+    """Button callback: switch the sidebar page, optionally preselecting a transaction type"""
+    st.session_state.nav_page = page
+    if transaction_type:
+        st.session_state.quick_transaction_type = transaction_type
+
 def overview_page():
     """Overview dashboard page"""
     st.header("📊 Financial Overview")
     
     # Get transaction summary
-    response = make_api_request("/transactions/summary/")
-    if response and response.status_code == 200:
-        summary = response.json()
-        
+    summary = dashboard_data("summary")
+    if summary is not None:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
@@ -194,32 +334,39 @@ def overview_page():
     st.subheader("🚀 Quick Actions")
     col1, col2, col3 = st.columns(3)
     
+    # Callbacks run before the rerun the click already triggers, so no extra st.rerun()
     with col1:
-        if st.button("➕ Add Income", type="primary"):
-            st.session_state.quick_transaction_type = "income"
-            st.rerun()
+        st.button("➕ Add Income", type="primary",
+                  on_click=navigate, args=("➕ Add Transaction", "income"))
     
     with col2:
-        if st.button("➖ Add Expense", type="secondary"):
-            st.session_state.quick_transaction_type = "expense"
-            st.rerun()
+        st.button("➖ Add Expense", type="secondary",
+                  on_click=navigate, args=("➕ Add Transaction", "expense"))
     
     with col3:
-        if st.button("📊 View Analytics", type="secondary"):
-            st.rerun()
+        st.button("📊 View Analytics", type="secondary",
+                  on_click=navigate, args=("📈 Wealth Insights",))
 
 def wealth_insights_page():
     """Wealth insights analytics page"""
     st.header("📈 Wealth Insights")
+    wealth_insights_fragment()
+
+@st.fragment
+def wealth_insights_fragment():
+    """Period selector and the insights it drives; changing the period reruns only this block"""
+    # Plotly is imported where charts are drawn, so login and overview never load it
+    import plotly.express as px
     
     # Period selector
     period_days = st.selectbox("Analysis Period", [7, 30, 90, 180, 365], index=1)
     
-    response = make_api_request(f"/transactions/analytics/wealth-insights?period_days={period_days}")
+    if period_days == 30:
+        insights = dashboard_data("insights")
+    else:
+        insights = fetch_json("/transactions/analytics/wealth-insights", {"period_days": period_days})
     
-    if response and response.status_code == 200:
-        insights = response.json()
-        
+    if insights is not None:
         if "message" in insights:
             st.info(insights["message"])
             return
@@ -228,19 +375,9 @@ def wealth_insights_page():
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            # Create gauge chart for financial health score
-            fig = go.Figure(go.Indicator(
-                mode = "gauge+number+delta",
-                value = insights["financial_health_score"],
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "Financial Health Score"},
-                delta = {'reference': 80},
-                gauge = {'axis': {'range': [None, 100]},
-                        'bar': {'color': "darkblue"},
-                        'steps' : [{'range': [0, 50], 'color': "lightgray"},
-                                  {'range': [50, 80], 'color': "gray"}],
-                        'threshold' : {'line': {'color': "red", 'width': 4},
-                                      'thickness': 0.75, 'value': 90}}))
+            # Gauge chart for financial health score; only the value changes between reruns
+            fig = gauge_figure()
+            fig.data[0].value = insights["financial_health_score"]
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
@@ -252,9 +389,12 @@ def wealth_insights_page():
         # Spending Distribution
         st.subheader("💳 Spending Distribution")
         if insights["spending_distribution"]:
-            categories = list(insights["spending_distribution"].keys())
-            amounts = [insights["spending_distribution"][cat]["amount"] for cat in categories]
-            percentages = [insights["spending_distribution"][cat]["percentage"] for cat in categories]
+            # One pass over the distribution instead of a lookup per category per column
+            categories, amounts = zip(*[
+                (category, entry["amount"])
+                for category, entry in insights["spending_distribution"].items()
+            ])
+            amounts = np.asarray(amounts, dtype=np.float32)
             
             fig = px.pie(
                 values=amounts, 
@@ -278,13 +418,13 @@ def wealth_insights_page():
 
 def spending_patterns_page():
     """Spending patterns analysis page"""
+    import plotly.express as px
+    
     st.header("🔍 Spending Pattern Analysis")
     
-    response = make_api_request("/transactions/analytics/spending-patterns")
+    patterns = dashboard_data("patterns")
     
-    if response and response.status_code == 200:
-        patterns = response.json()
-        
+    if patterns is not None:
         if "message" in patterns:
             st.info(patterns["message"])
             return
@@ -297,8 +437,12 @@ def spending_patterns_page():
         weekly_data = patterns["weekly_patterns"]
         
         if weekly_data:
+            # NumPy arrays go to Plotly.js as compact typed arrays instead of JSON lists
             days = list(weekly_data.keys())
-            amounts = [weekly_data[day]["total_spent"] for day in days]
+            amounts = np.fromiter(
+                (weekly_data[day]["total_spent"] for day in days),
+                dtype=np.float32, count=len(days)
+            )
             
             fig = px.bar(
                 x=days,
@@ -313,8 +457,8 @@ def spending_patterns_page():
         monthly_data = patterns["monthly_trends"]
         
         if monthly_data:
-            months = list(monthly_data.keys())
-            amounts = list(monthly_data.values())
+            months = np.array(list(monthly_data.keys()))
+            amounts = np.fromiter(monthly_data.values(), dtype=np.float32, count=len(monthly_data))
             
             fig = px.line(
                 x=months,
@@ -337,8 +481,8 @@ def spending_patterns_page():
         # Show anomalous transactions
         if anomalies["anomalous_transactions"]:
             st.subheader("🚨 High Spending Days")
-            anomaly_df = pd.DataFrame(anomalies["anomalous_transactions"])
-            st.dataframe(anomaly_df, use_container_width=True)
+            # st.dataframe takes the list of records directly; no intermediate pandas frame
+            st.dataframe(anomalies["anomalous_transactions"], use_container_width=True)
         
         # Recommendations
         st.subheader("💡 Recommendations")
@@ -348,7 +492,11 @@ def spending_patterns_page():
 def transactions_page():
     """Transactions management page"""
     st.header("💸 Transaction History")
-    
+    transactions_fragment()
+
+@st.fragment
+def transactions_fragment():
+    """Filters, fetch and table; a filter or paging change reruns only this block"""
     # Filters
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -358,41 +506,58 @@ def transactions_page():
     with col3:
         end_date = st.date_input("End Date", value=date.today())
     
-    # Build query parameters
-    params = []
-    if transaction_type != "All":
-        params.append(f"transaction_type={transaction_type}")
-    params.append(f"start_date={start_date}")
-    params.append(f"end_date={end_date}")
+    # Go back to the first page whenever the filters change
+    filters = (transaction_type, start_date, end_date)
+    if st.session_state.get("tx_filters") != filters:
+        st.session_state.tx_filters = filters
+        st.session_state.tx_offset = 0
+    offset = st.session_state.tx_offset
     
-    query_string = "&".join(params)
-    response = make_api_request(f"/transactions/?{query_string}")
+    # Filters are applied in-process to the cached full history, so changing
+    # them never goes back to the API
+    all_transactions = _resolve_fetch(lambda: load_all_transactions(st.session_state.token))
     
-    if response and response.status_code == 200:
-        transactions = response.json()
-        
-        if transactions:
-            # Convert to DataFrame for better display
-            df = pd.DataFrame(transactions)
-            df['transaction_date'] = pd.to_datetime(df['transaction_date']).dt.strftime('%Y-%m-%d')
-            
+    if all_transactions is not None:
+        dates = all_transactions["transaction_date"]
+        mask = (dates >= start_date.isoformat()) & (dates <= end_date.isoformat())
+        if transaction_type != "All":
+            mask &= all_transactions["transaction_type"] == transaction_type
+        filtered = all_transactions[mask]
+        df = filtered.iloc[offset:offset + TX_PAGE_SIZE]
+        
+        if len(df):
             # Display transactions
-            st.dataframe(df[['transaction_date', 'description', 'amount', 'transaction_type']], 
-                        use_container_width=True)
+            st.dataframe(df, use_container_width=True, hide_index=True)
             
-            st.caption(f"Showing {len(transactions)} transactions")
+            st.caption(f"Showing transactions {offset + 1}-{offset + len(df)} of {len(filtered)}")
         else:
             st.info("No transactions found for the selected criteria")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅️ Previous", disabled=offset == 0):
+                st.session_state.tx_offset = max(offset - TX_PAGE_SIZE, 0)
+                st.rerun(scope="fragment")
+        with col2:
+            if st.button("Next ➡️", disabled=offset + TX_PAGE_SIZE >= len(filtered)):
+                st.session_state.tx_offset = offset + TX_PAGE_SIZE
+                st.rerun(scope="fragment")
 
 def add_transaction_page():
     """Add new transaction page"""
     st.header("➕ Add New Transaction")
     
+    # A quick action's preselection applies to this visit only; the keyed
+    # widget keeps it through the submit rerun
+    quick_type = st.session_state.pop("quick_transaction_type", None)
+    if quick_type:
+        st.session_state.add_transaction_type = quick_type
+    
     with st.form("add_transaction"):
         col1, col2 = st.columns(2)
         
         with col1:
-            transaction_type = st.selectbox("Type", ["income", "expense"])
+            transaction_type = st.selectbox("Type", ["income", "expense"], key="add_transaction_type")
             amount = st.number_input("Amount ($)", min_value=0.01, step=0.01)
             description = st.text_input("Description")
         
@@ -418,6 +583,10 @@ def add_transaction_page():
                 response = make_api_request("/transactions/", "POST", transaction_data)
                 
                 if response and response.status_code == 200:
+                    # Summaries and listings are stale now
+                    cached_get.clear()
+                    bootstrap.clear()
+                    load_all_transactions.clear()
                     st.success("✅ Transaction added successfully!")
                 else:
                     st.error("❌ Failed to add transaction")
@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import sqlite3
 import hashlib
+import io
+import hmac
+import os
 
 # Configure page
 st.set_page_config(
@@ -13,89 +17,352 @@ st.set_page_config(
     layout="wide"
 )
 
+DB_PATH = 'simple_finance.db'
+
+# Applied once when a session's connection is opened
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+)
+
+def get_conn():
+    """This session's SQLite connection, kept across reruns so its page cache survives.
+
+    Each browser session opens its own: one connection shared between sessions
+    would also share a transaction, so one user's failed write could roll back
+    (or commit) another's. WAL and busy_timeout handle the concurrency instead.
+    """
+    conn = st.session_state.get("db_conn")
+    if conn is None:
+        # Reruns may land on different script threads, but never run concurrently
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        # SQLite's lower() folds ASCII only; searches fold both sides with str.lower
+        conn.create_function("py_lower", 1, lambda text: text if text is None else text.lower(),
+                             deterministic=True)
+        st.session_state.db_conn = conn
+    return conn
+
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
-    
-    # Create users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password_hash TEXT)''')
-    
-    # Create transactions table
-    c.execute('''CREATE TABLE IF NOT EXISTS transactions
-                 (id INTEGER PRIMARY KEY, user_id INTEGER, amount REAL, 
-                  description TEXT, type TEXT, date TEXT)''')
+    conn = get_conn()
     
-    conn.commit()
-    conn.close()
+    with conn:
+        # Create users table
+        conn.execute('''CREATE TABLE IF NOT EXISTS users
+                     (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password_hash TEXT)''')
+        
+        # Per-user scrypt salt; NULL marks a legacy unsalted SHA-256 hash
+        user_columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        if 'salt' not in user_columns:
+            conn.execute("ALTER TABLE users ADD COLUMN salt BLOB")
+        
+        # Create transactions table
+        conn.execute('''CREATE TABLE IF NOT EXISTS transactions
+                     (id INTEGER PRIMARY KEY, user_id INTEGER, amount REAL, 
+                      description TEXT, type TEXT, date TEXT)''')
+        
+        # Per-user settings
+        conn.execute('''CREATE TABLE IF NOT EXISTS settings
+                     (user_id INTEGER PRIMARY KEY, monthly_budget REAL)''')
+        
+        # Indexes for the per-user listings, filters and type totals
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_user_date ON transactions(user_id, date DESC)")
+        # Covers the type totals (and type filters), so they are answered from the index alone;
+        # it supersedes the narrower (user_id, type) index
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_cover ON transactions(user_id, type, amount, date)")
+        conn.execute("DROP INDEX IF EXISTS idx_tx_user_type")
 
 # User authentication
-def hash_password(password):
+SCRYPT_PARAMS = {'n': 2**14, 'r': 8, 'p': 1}
+
+def hash_password(password, salt):
+    return hashlib.scrypt(password.encode(), salt=salt, **SCRYPT_PARAMS).hex()
+
+def legacy_hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def create_user(username, password):
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
+    conn = get_conn()
     try:
-        password_hash = hash_password(password)
-        c.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", 
-                 (username, password_hash))
-        conn.commit()
+        salt = os.urandom(16)
+        password_hash = hash_password(password, salt)
+        with conn:
+            conn.execute("INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)", 
+                         (username, password_hash, salt))
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
 
 def verify_user(username, password):
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
-    password_hash = hash_password(password)
-    c.execute("SELECT id FROM users WHERE username=? AND password_hash=?", 
-              (username, password_hash))
-    result = c.fetchone()
-    conn.close()
-    return result[0] if result else None
+    conn = get_conn()
+    result = conn.execute("SELECT id, password_hash, salt FROM users WHERE username=?", 
+                          (username,)).fetchone()
+    if result is None:
+        return None
+    
+    user_id, password_hash, salt = result
+    if salt is None:
+        # Account from before salted hashes: check the old digest, then upgrade it
+        if not hmac.compare_digest(password_hash, legacy_hash_password(password)):
+            return None
+        salt = os.urandom(16)
+        with conn:
+            conn.execute("UPDATE users SET password_hash=?, salt=? WHERE id=?",
+                         (hash_password(password, salt), salt, user_id))
+        return user_id
+    
+    return user_id if hmac.compare_digest(password_hash, hash_password(password, salt)) else None
 
 def add_transaction(user_id, amount, description, trans_type):
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
+    conn = get_conn()
+    date_str = datetime.now().strftime('%Y-%m-%d')
+    with conn:
+        conn.execute("INSERT INTO transactions (user_id, amount, description, type, date) VALUES (?, ?, ?, ?, ?)",
+                     (user_id, amount, description, trans_type, date_str))
+    load_transactions.clear()
+
+def add_transactions_bulk(rows):
+    """Insert (user_id, amount, description, type, date) rows in one transaction"""
+    conn = get_conn()
+    with conn:
+        conn.executemany("INSERT INTO transactions (user_id, amount, description, type, date) VALUES (?, ?, ?, ?, ?)",
+                         rows)
+    load_transactions.clear()
+
+TRANSACTION_TYPES = ['income', 'expense']
+
+# Column sets, so each page moves only the fields it reads out of SQLite
+TRANSACTION_COLUMNS = ('id', 'user_id', 'amount', 'description', 'type', 'date')
+EDITOR_COLUMNS = ('id', 'date', 'description', 'amount', 'type')
+DISPLAY_COLUMNS = ('date', 'description', 'amount', 'type')
+ANALYTICS_COLUMNS = ('date', 'amount', 'type')
+BUDGET_COLUMNS = ('date', 'description', 'amount', 'type')
+
+# Editor columns the user can change; id and date are read-only
+EDITABLE_COLUMNS = ['description', 'amount', 'type']
+
+def select_list(columns):
+    """SELECT list for a subset of transaction columns; only known names are accepted"""
+    unknown = set(columns) - set(TRANSACTION_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown transaction columns: {sorted(unknown)}")
+    return ", ".join(columns)
+
+def read_transactions(query, params):
+    """Run a transactions SELECT and build the DataFrame with explicit dtypes,
+    skipping the per-call type inference of pd.read_sql_query"""
+    cursor = get_conn().execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    n = len(rows)
+    data = {}
+    for column, values in zip(columns, zip(*rows) if rows else [()] * len(columns)):
+        if column in ('id', 'user_id'):
+            data[column] = np.fromiter(values, dtype=np.int64, count=n)
+        elif column == 'amount':
+            data[column] = np.fromiter(values, dtype=np.float64, count=n)
+        elif column == 'type':
+            data[column] = pd.Categorical(values, categories=TRANSACTION_TYPES)
+        elif column == 'date':
+            data[column] = pd.to_datetime(values, format='%Y-%m-%d', cache=True)
+        else:
+            data[column] = list(values)
+    return pd.DataFrame(data, columns=columns)
+
+def get_transactions(user_id, columns=TRANSACTION_COLUMNS):
+    return read_transactions(f"SELECT {select_list(columns)} FROM transactions WHERE user_id=? ORDER BY date DESC",
+                             (user_id,))
+
+def get_transactions_filtered(user_id, trans_type=None, min_amount=None, max_amount=None,
+                              start_date=None, end_date=None, search=None, limit=None,
+                              columns=TRANSACTION_COLUMNS):
+    """get_transactions with the filters applied in SQL, so only matching rows leave SQLite"""
+    clauses = ["user_id=?"]
+    params = [user_id]
+    if trans_type:
+        clauses.append("type=?")
+        params.append(trans_type)
+    if min_amount is not None:
+        clauses.append("amount>=?")
+        params.append(min_amount)
+    if max_amount is not None:
+        clauses.append("amount<=?")
+        params.append(max_amount)
+    if start_date:
+        clauses.append("date>=?")
+        params.append(start_date.isoformat())
+    if end_date:
+        clauses.append("date<=?")
+        params.append(end_date.isoformat())
+    if search:
+        # Literal substring match against a term lowered once here: no pattern
+        # syntax to escape or compile. Both sides fold with str.lower, so
+        # non-ASCII letters match case-insensitively too
+        clauses.append("instr(py_lower(description), ?) > 0")
+        params.append(search.lower())
+    
+    query = f"SELECT {select_list(columns)} FROM transactions WHERE {' AND '.join(clauses)} ORDER BY date DESC"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return read_transactions(query, params)
+
+def get_type_totals(user_id):
+    """{type: (total amount, count)} for a user, aggregated by SQLite"""
+    rows = get_conn().execute(
+        "SELECT type, SUM(amount), COUNT(*) FROM transactions WHERE user_id=? GROUP BY type",
+        (user_id,)
+    ).fetchall()
+    return {trans_type: (total, count) for trans_type, total, count in rows}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_transactions(user_id, columns=TRANSACTION_COLUMNS):
+    """Cached get_transactions; every write helper clears it"""
+    return get_transactions(user_id, columns)
+
+def delete_transactions_bulk(transaction_ids):
+    """Delete several transactions with one commit instead of one per row"""
+    conn = get_conn()
+    with conn:
+        conn.executemany("DELETE FROM transactions WHERE id=?", [(i,) for i in transaction_ids])
+    load_transactions.clear()
+
+def update_transactions_bulk(rows):
+    """Apply (amount, description, type, id) updates in one transaction"""
+    conn = get_conn()
+    with conn:
+        conn.executemany("UPDATE transactions SET amount=?, description=?, type=? WHERE id=?", rows)
+    load_transactions.clear()
+
+def save_transaction_edits(user_id, original, edited):
+    """Write the difference between the editor's input and output, returning (added, updated, deleted) counts"""
+    new_rows = edited[edited['id'].isna()].dropna(subset=EDITABLE_COLUMNS)
+    kept = edited[edited['id'].notna()].astype({'id': int}).set_index('id')
+    before = original.set_index('id')
+    
+    deleted_ids = [int(i) for i in before.index.difference(kept.index)]
+    before = before.loc[kept.index, EDITABLE_COLUMNS]
+    changed = kept.loc[(kept[EDITABLE_COLUMNS] != before).any(axis=1), EDITABLE_COLUMNS]
+    
     date_str = datetime.now().strftime('%Y-%m-%d')
-    c.execute("INSERT INTO transactions (user_id, amount, description, type, date) VALUES (?, ?, ?, ?, ?)",
-              (user_id, amount, description, trans_type, date_str))
-    conn.commit()
-    conn.close()
-
-def get_transactions(user_id):
-    conn = sqlite3.connect('simple_finance.db')
-    df = pd.read_sql_query("SELECT * FROM transactions WHERE user_id=? ORDER BY date DESC", 
-                          conn, params=(user_id,))
-    conn.close()
-    return df
-
-def delete_transaction(transaction_id):
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM transactions WHERE id=?", (transaction_id,))
-    conn.commit()
-    conn.close()
-
-def update_transaction(transaction_id, amount, description, trans_type):
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
-    c.execute("UPDATE transactions SET amount=?, description=?, type=? WHERE id=?", 
-              (amount, description, trans_type, transaction_id))
-    conn.commit()
-    conn.close()
+    if len(new_rows):
+        add_transactions_bulk([
+            (user_id, float(row.amount), row.description, row.type, date_str)
+            for row in new_rows.itertuples(index=False)
+        ])
+    if len(changed):
+        update_transactions_bulk([
+            (float(row.amount), row.description, row.type, int(row.Index))
+            for row in changed.itertuples()
+        ])
+    if deleted_ids:
+        delete_transactions_bulk(deleted_ids)
+    return len(new_rows), len(changed), len(deleted_ids)
+
+DEFAULT_MONTHLY_BUDGET = 1000.0
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_monthly_budget(user_id):
+    """The user's saved monthly budget, or the default if none is set"""
+    result = get_conn().execute("SELECT monthly_budget FROM settings WHERE user_id=?", (user_id,)).fetchone()
+    return result[0] if result else DEFAULT_MONTHLY_BUDGET
+
+def set_monthly_budget(user_id, monthly_budget):
+    conn = get_conn()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO settings (user_id, monthly_budget) VALUES (?, ?)",
+                     (user_id, monthly_budget))
+    load_monthly_budget.clear()
 
 def get_transaction_by_id(transaction_id):
-    conn = sqlite3.connect('simple_finance.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM transactions WHERE id=?", (transaction_id,))
-    result = c.fetchone()
-    conn.close()
-    return result
+    return get_conn().execute("SELECT * FROM transactions WHERE id=?", (transaction_id,)).fetchone()
+
+# Chart builders, cached on their hashable input rows so an unchanged
+# dataset skips figure construction and validation on rerun
+@st.cache_data(show_spinner=False)
+def build_pie(summary):
+    """Income vs expenses pie from ((type, amount), ...)"""
+    return px.pie(
+        pd.DataFrame(summary, columns=['type', 'amount']), 
+        values='amount', 
+        names='type',
+        title="Income vs Expenses",
+        color_discrete_map={'income': 'green', 'expense': 'red'}
+    )
+
+def monthly_type_totals(df):
+    """((month, type, amount), ...) for every month/type pair present, summed with one
+    np.bincount pass over integer month/type bins instead of a pandas groupby"""
+    months = df['date'].to_numpy().astype('datetime64[M]')
+    first_month = months.min()
+    n_types = len(TRANSACTION_TYPES)
+    bins = (months - first_month).astype(np.int64) * n_types + df['type'].cat.codes.to_numpy()
+    n_bins = bins.max() + 1
+    totals = np.bincount(bins, weights=df['amount'].to_numpy(), minlength=n_bins)
+    present = np.bincount(bins, minlength=n_bins) > 0
+    return tuple(
+        (str(first_month + b // n_types), TRANSACTION_TYPES[b % n_types], float(totals[b]))
+        for b in np.flatnonzero(present)
+    )
+
+@st.cache_data(show_spinner=False)
+def build_monthly_bar(monthly):
+    """Grouped monthly bars from ((month, type, amount), ...)"""
+    return px.bar(
+        pd.DataFrame(monthly, columns=['month', 'type', 'amount']),
+        x='month',
+        y='amount',
+        color='type',
+        title="Monthly Trends",
+        barmode='group'
+    )
+
+@st.cache_data(show_spinner=False)
+def build_health_gauge(score):
+    """Financial health gauge for a 0-100 score"""
+    return go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=score,
+        title={'text': "Financial Health Score"},
+        domain={'x': [0, 1], 'y': [0, 1]},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 50], 'color': "lightgray"},
+                {'range': [50, 80], 'color': "yellow"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 90
+            }
+        }
+    ))
+
+@st.cache_data(show_spinner=False)
+def build_category_bar(category_spending):
+    """This month's spending bars from ((description, amount), ...)"""
+    return px.bar(
+        pd.DataFrame(category_spending, columns=['description', 'amount']),
+        x='description',
+        y='amount',
+        title="Spending by Category This Month",
+        labels={'description': 'Category', 'amount': 'Amount (£)'}
+    )
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def csv_bytes(df):
+    """CSV export of a frame, cached on its contents so reruns reuse the encoded bytes"""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
 
 # Initialize session state
 if 'user_id' not in st.session_state:
@@ -164,6 +431,7 @@ def main():
                 st.session_state.username = None
                 st.rerun()
         
+        # Each page is a fragment, so its own widgets rerun only that page
         if page == "📊 Overview":
             overview_page()
         elif page == "➕ Add Transaction":
@@ -177,15 +445,16 @@ def main():
         elif page == "🔍 Search":
             search_page()
 
+@st.fragment
 def overview_page():
     st.header("📊 Financial Overview")
     
-    df = get_transactions(st.session_state.user_id)
+    # Totals come straight from SQL; only the recent rows are loaded
+    totals = get_type_totals(st.session_state.user_id)
     
-    if not df.empty:
-        # Calculate metrics
-        income = df[df['type'] == 'income']['amount'].sum()
-        expenses = df[df['type'] == 'expense']['amount'].sum()
+    if totals:
+        income = totals.get('income', (0.0, 0))[0]
+        expenses = totals.get('expense', (0.0, 0))[0]
         net = income - expenses
         
         col1, col2, col3, col4 = st.columns(4)
@@ -197,14 +466,17 @@ def overview_page():
         with col3:
             st.metric("📊 Net Income", f"£{net:,.2f}")
         with col4:
-            st.metric("📋 Transactions", len(df))
+            st.metric("📋 Transactions", sum(count for _, count in totals.values()))
         
         # Recent transactions
         st.subheader("🕐 Recent Transactions")
-        st.dataframe(df.head(10), use_container_width=True)
+        st.dataframe(get_transactions_filtered(st.session_state.user_id, limit=10, columns=DISPLAY_COLUMNS),
+                     use_container_width=True,
+                     column_config={"date": st.column_config.DateColumn("date")})
     else:
         st.info("No transactions yet. Add your first transaction!")
 
+@st.fragment
 def add_transaction_page():
     st.header("➕ Add New Transaction")
     
@@ -228,10 +500,11 @@ def add_transaction_page():
             else:
                 st.error("Please fill all fields")
 
+@st.fragment
 def transactions_page():
     st.header("💸 Transaction Management")
     
-    df = get_transactions(st.session_state.user_id)
+    df = load_transactions(st.session_state.user_id, EDITOR_COLUMNS)
     
     if not df.empty:
         # Filters
@@ -239,66 +512,39 @@ def transactions_page():
         with col1:
             filter_type = st.selectbox("Filter by type", ["All", "income", "expense"])
         with col2:
-            st.info("💡 Use Edit/Delete buttons on each transaction below")
+            st.info("💡 Edit cells, add or delete rows below, then save")
         
         # Apply filter
-        filtered_df = df.copy()
+        filtered_df = df
         if filter_type != "All":
-            filtered_df = df[df['type'] == filter_type]
+            filtered_df = get_transactions_filtered(st.session_state.user_id, trans_type=filter_type,
+                                                    columns=EDITOR_COLUMNS)
         
-        # Display transactions with action buttons
+        # All rows in one editable table; changes are written when saved
         st.subheader("Your Transactions")
         
-        for idx, row in filtered_df.iterrows():
-            with st.container():
-                col1, col2, col3, col4, col5, col6 = st.columns([1, 2, 1, 1, 1, 1])
-                
-                with col1:
-                    st.write(f"**{row['date']}**")
-                with col2:
-                    st.write(f"**{row['description']}**")
-                with col3:
-                    color = "green" if row['type'] == 'income' else "red"
-                    st.markdown(f"<span style='color:{color}'>**£{row['amount']:,.2f}**</span>", unsafe_allow_html=True)
-                with col4:
-                    type_emoji = "💰" if row['type'] == 'income' else "💸"
-                    st.write(f"{type_emoji} {row['type'].title()}")
-                with col5:
-                    if st.button("✏️ Edit", key=f"edit_{row['id']}"):
-                        st.session_state[f'editing_{row["id"]}'] = True
-                        st.rerun()
-                with col6:
-                    if st.button("🗑️ Delete", key=f"delete_{row['id']}", type="secondary"):
-                        delete_transaction(row['id'])
-                        st.success(f"Deleted: {row['description']}")
-                        st.rerun()
-                
-                # Edit form
-                if st.session_state.get(f'editing_{row["id"]}', False):
-                    with st.form(f"edit_form_{row['id']}"):
-                        st.write(f"**Editing: {row['description']}**")
-                        edit_col1, edit_col2, edit_col3 = st.columns(3)
-                        
-                        with edit_col1:
-                            new_amount = st.number_input("Amount (£)", value=float(row['amount']), min_value=0.01, step=0.01, key=f"amount_{row['id']}")
-                        with edit_col2:
-                            new_desc = st.text_input("Description", value=row['description'], key=f"desc_{row['id']}")
-                        with edit_col3:
-                            new_type = st.selectbox("Type", ["income", "expense"], index=0 if row['type']=='income' else 1, key=f"type_{row['id']}")
-                        
-                        edit_col4, edit_col5 = st.columns(2)
-                        with edit_col4:
-                            if st.form_submit_button("💾 Save Changes"):
-                                update_transaction(row['id'], new_amount, new_desc, new_type)
-                                st.session_state[f'editing_{row["id"]}'] = False
-                                st.success("Transaction updated successfully!")
-                                st.rerun()
-                        with edit_col5:
-                            if st.form_submit_button("❌ Cancel"):
-                                st.session_state[f'editing_{row["id"]}'] = False
-                                st.rerun()
-                
-                st.markdown("---")
+        original = filtered_df
+        edited = st.data_editor(
+            original,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "id": st.column_config.NumberColumn("ID", disabled=True),
+                "date": st.column_config.DateColumn("Date", disabled=True),
+                "description": st.column_config.TextColumn("Description", required=True),
+                "amount": st.column_config.NumberColumn("Amount (£)", min_value=0.01, format="£%.2f", required=True),
+                "type": st.column_config.SelectboxColumn("Type", options=TRANSACTION_TYPES, required=True),
+            },
+            key=f"tx_editor_{st.session_state.get('tx_editor_version', 0)}"
+        )
+        
+        if st.button("💾 Save Changes", type="primary"):
+            added, updated, deleted = save_transaction_edits(st.session_state.user_id, original, edited)
+            # A fresh editor key drops the applied edits from widget state
+            st.session_state.tx_editor_version = st.session_state.get('tx_editor_version', 0) + 1
+            st.success(f"Saved: {added} added, {updated} updated, {deleted} deleted")
+            st.rerun()
         
         # Bulk actions
         st.subheader("📊 Bulk Actions")
@@ -306,7 +552,7 @@ def transactions_page():
         
         with col1:
             # Download CSV
-            csv = filtered_df.to_csv(index=False)
+            csv = csv_bytes(filtered_df)
             st.download_button(
                 label="📥 Download CSV",
                 data=csv,
@@ -319,11 +565,10 @@ def transactions_page():
             if st.button("🗑️ Clear All Transactions", type="secondary"):
                 if st.session_state.get('confirm_clear', False):
                     # Actually delete all
-                    conn = sqlite3.connect('simple_finance.db')
-                    c = conn.cursor()
-                    c.execute("DELETE FROM transactions WHERE user_id=?", (st.session_state.user_id,))
-                    conn.commit()
-                    conn.close()
+                    conn = get_conn()
+                    with conn:
+                        conn.execute("DELETE FROM transactions WHERE user_id=?", (st.session_state.user_id,))
+                    load_transactions.clear()
                     st.success("All transactions cleared!")
                     st.session_state.confirm_clear = False
                     st.rerun()
@@ -341,70 +586,28 @@ def transactions_page():
         if st.button("➕ Add Transaction"):
             st.switch_page("Add Transaction")
 
+@st.fragment
 def analytics_page():
     st.header("📈 Financial Analytics")
     
-    df = get_transactions(st.session_state.user_id)
+    df = load_transactions(st.session_state.user_id, ANALYTICS_COLUMNS)
     
     if not df.empty and len(df) > 1:
-        # Convert date column
-        df['date'] = pd.to_datetime(df['date'])
-        
         # Income vs Expenses chart
-        summary = df.groupby('type')['amount'].sum().reset_index()
-        
-        fig = px.pie(
-            summary, 
-            values='amount', 
-            names='type',
-            title="Income vs Expenses",
-            color_discrete_map={'income': 'green', 'expense': 'red'}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        sums = df.groupby('type', sort=False, observed=True)['amount'].sum()
+        st.plotly_chart(build_pie(tuple(sums.items())), use_container_width=True)
         
         # Monthly trends
-        df['month'] = df['date'].dt.to_period('M')
-        monthly = df.groupby(['month', 'type'])['amount'].sum().reset_index()
-        monthly['month'] = monthly['month'].astype(str)
-        
-        fig2 = px.bar(
-            monthly,
-            x='month',
-            y='amount',
-            color='type',
-            title="Monthly Trends",
-            barmode='group'
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(build_monthly_bar(monthly_type_totals(df)), use_container_width=True)
         
-        # Financial Health Score
-        income = df[df['type'] == 'income']['amount'].sum()
-        expenses = df[df['type'] == 'expense']['amount'].sum()
+        # Financial Health Score, from the totals already grouped for the pie
+        income = sums.get('income', 0.0)
+        expenses = sums.get('expense', 0.0)
         
         if income > 0:
             savings_rate = ((income - expenses) / income) * 100
             health_score = min(100, max(0, savings_rate))
-            
-            fig3 = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=health_score,
-                title={'text': "Financial Health Score"},
-                domain={'x': [0, 1], 'y': [0, 1]},
-                gauge={
-                    'axis': {'range': [None, 100]},
-                    'bar': {'color': "darkblue"},
-                    'steps': [
-                        {'range': [0, 50], 'color': "lightgray"},
-                        {'range': [50, 80], 'color': "yellow"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': 90
-                    }
-                }
-            ))
-            st.plotly_chart(fig3, use_container_width=True)
+            st.plotly_chart(build_health_gauge(float(health_score)), use_container_width=True)
             
             # Insights
             st.subheader("💡 Financial Insights")
@@ -417,47 +620,47 @@ def analytics_page():
     else:
         st.info("Add more transactions to see analytics.")
 
+@st.fragment
 def budgets_page():
     st.header("🎯 Budget Management")
     
-    df = get_transactions(st.session_state.user_id)
+    df = load_transactions(st.session_state.user_id, BUDGET_COLUMNS)
     
     if not df.empty:
-        # Calculate current month expenses
-        df['date'] = pd.to_datetime(df['date'])
-        current_month = datetime.now().strftime('%Y-%m')
-        monthly_expenses = df[
-            (df['type'] == 'expense') & 
-            (df['date'].dt.strftime('%Y-%m') == current_month)
-        ]['amount'].sum()
+        # Calculate current month expenses; dates are compared as month
+        # integers instead of being formatted back into strings per row
+        months = df['date'].to_numpy().astype('datetime64[M]')
+        current_month = np.datetime64(datetime.now().strftime('%Y-%m'))
+        monthly_df = df[(months == current_month) & (df['type'] == 'expense').to_numpy()]
+        monthly_expenses = monthly_df['amount'].sum()
         
         # Budget setter
         st.subheader("📊 Set Monthly Budget")
         
-        # Get/set budget from session state
-        if 'monthly_budget' not in st.session_state:
-            st.session_state.monthly_budget = 1000.0  # Default budget
+        # Budget is stored per user, so it survives logout and refresh
+        monthly_budget = load_monthly_budget(st.session_state.user_id)
         
         col1, col2 = st.columns(2)
         
         with col1:
             new_budget = st.number_input(
                 "Monthly Budget (£)", 
-                value=st.session_state.monthly_budget, 
+                value=monthly_budget, 
                 min_value=0.01, 
                 step=10.0
             )
             
             if st.button("💾 Update Budget"):
-                st.session_state.monthly_budget = new_budget
+                set_monthly_budget(st.session_state.user_id, new_budget)
+                monthly_budget = new_budget
                 st.success("Budget updated successfully!")
         
         with col2:
             # Budget progress
-            budget_used_pct = (monthly_expenses / st.session_state.monthly_budget) * 100
-            remaining_budget = st.session_state.monthly_budget - monthly_expenses
+            budget_used_pct = (monthly_expenses / monthly_budget) * 100
+            remaining_budget = monthly_budget - monthly_expenses
             
-            st.metric("Monthly Budget", f"£{st.session_state.monthly_budget:,.2f}")
+            st.metric("Monthly Budget", f"£{monthly_budget:,.2f}")
             st.metric("Spent This Month", f"£{monthly_expenses:,.2f}")
             st.metric("Remaining", f"£{remaining_budget:,.2f}")
         
@@ -474,7 +677,7 @@ def budgets_page():
         st.progress(min(budget_used_pct / 100, 1.0))
         
         if budget_used_pct > 100:
-            st.error(f"⚠️ You've exceeded your budget by £{monthly_expenses - st.session_state.monthly_budget:.2f}!")
+            st.error(f"⚠️ You've exceeded your budget by £{monthly_expenses - monthly_budget:.2f}!")
         elif budget_used_pct > 80:
             st.warning(f"⚠️ You've used {budget_used_pct:.1f}% of your budget. Be careful!")
         else:
@@ -482,32 +685,23 @@ def budgets_page():
         
         # Category breakdown
         st.subheader("💳 Expense Categories This Month")
-        monthly_df = df[
-            (df['type'] == 'expense') & 
-            (df['date'].dt.strftime('%Y-%m') == current_month)
-        ]
         
         if not monthly_df.empty:
             # Group by description (as a simple category system)
             category_spending = monthly_df.groupby('description')['amount'].sum().reset_index()
             category_spending = category_spending.sort_values('amount', ascending=False)
-            
-            fig = px.bar(
-                category_spending,
-                x='description',
-                y='amount',
-                title="Spending by Category This Month",
-                labels={'description': 'Category', 'amount': 'Amount (£)'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_category_bar(tuple(category_spending.itertuples(index=False, name=None))),
+                            use_container_width=True)
         
     else:
         st.info("Add some transactions to set up budgets!")
 
+@st.fragment
 def search_page():
     st.header("🔍 Search Transactions")
     
-    df = get_transactions(st.session_state.user_id)
+    # Only the amounts are needed up front, for the slider bounds
+    df = load_transactions(st.session_state.user_id, ('amount',))
     
     if not df.empty:
         # Search filters
@@ -532,27 +726,17 @@ def search_page():
                 max_value=datetime.now()
             )
         
-        # Apply filters
-        filtered_df = df.copy()
-        
-        # Text search
-        if search_term:
-            filtered_df = filtered_df[filtered_df['description'].str.contains(search_term, case=False, na=False)]
-        
-        # Amount range filter
-        filtered_df = filtered_df[
-            (filtered_df['amount'] >= amount_range[0]) & 
-            (filtered_df['amount'] <= amount_range[1])
-        ]
-        
-        # Date range filter
-        if len(date_range) == 2:
-            start_date, end_date = date_range
-            filtered_df['date'] = pd.to_datetime(filtered_df['date'])
-            filtered_df = filtered_df[
-                (filtered_df['date'].dt.date >= start_date) & 
-                (filtered_df['date'].dt.date <= end_date)
-            ]
+        # Apply filters in SQL
+        start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+        filtered_df = get_transactions_filtered(
+            st.session_state.user_id,
+            min_amount=amount_range[0],
+            max_amount=amount_range[1],
+            start_date=start_date,
+            end_date=end_date,
+            search=search_term,
+            columns=DISPLAY_COLUMNS
+        )
         
         # Display results
         st.subheader(f"Search Results ({len(filtered_df)} transactions found)")
@@ -560,23 +744,25 @@ def search_page():
         if not filtered_df.empty:
             # Summary statistics
             col1, col2, col3 = st.columns(3)
+            sums = filtered_df.groupby('type', sort=False, observed=True)['amount'].sum()
+            total_income = sums.get('income', 0.0)
+            total_expenses = sums.get('expense', 0.0)
             
             with col1:
-                total_income = filtered_df[filtered_df['type'] == 'income']['amount'].sum()
                 st.metric("Total Income", f"£{total_income:,.2f}")
             
             with col2:
-                total_expenses = filtered_df[filtered_df['type'] == 'expense']['amount'].sum()
                 st.metric("Total Expenses", f"£{total_expenses:,.2f}")
             
             with col3:
                 st.metric("Net Amount", f"£{total_income - total_expenses:,.2f}")
             
             # Results table
-            st.dataframe(filtered_df[['date', 'description', 'amount', 'type']], use_container_width=True)
+            st.dataframe(filtered_df, use_container_width=True,
+                         column_config={"date": st.column_config.DateColumn("date")})
             
             # Export filtered results
-            csv = filtered_df.to_csv(index=False)
+            csv = csv_bytes(filtered_df)
             st.download_button(
                 label="📥 Download Search Results",
                 data=csv,
@@ -1,8 +1,25 @@
 import subprocess
 import time
 import threading
+import urllib.error
+import urllib.request
 import webbrowser
 
+API_URL = "http://127.0.0.1:8000/"
+
+def wait_ready(url, timeout=30):
+    """Poll url until the server answers or timeout seconds pass; returns whether it came up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5):
+                return True
+        except urllib.error.HTTPError:
+            return True  # Any HTTP response means the server is listening
+        except OSError:
+            time.sleep(0.1)
+    return False
+
 def start_api():
     """Start FastAPI server"""
     print("🚀 Starting API server...")
@@ -15,7 +32,6 @@ def start_api():
 def start_dashboard():
     """Start Streamlit dashboard"""
     print("📊 Starting dashboard...")
-    time.sleep(5)  # Wait for API
     subprocess.run([
         "streamlit", "run", "dashboard.py", 
         "--server.port", "8501"
@@ -31,8 +47,9 @@ if __name__ == "__main__":
     api_thread = threading.Thread(target=start_api, daemon=True)
     api_thread.start()
     
-    # Wait a bit then open browser
-    time.sleep(8)
+    # Open the browser as soon as the API answers
+    if not wait_ready(API_URL):
+        print("⚠️ API did not respond within 30 seconds; starting dashboard anyway")
     print("🌐 Opening browser...")
     webbrowser.open("http://localhost:8501")
     
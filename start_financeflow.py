@@ -7,10 +7,27 @@ Starts both the FastAPI backend and Streamlit dashboard
 import subprocess
 import sys
 import time
+import urllib.error
+import urllib.request
 import webbrowser
 from threading import Thread
 import os
 
+API_URL = "http://127.0.0.1:8000/"
+
+def wait_ready(url, timeout=30):
+    """Poll url until the server answers or timeout seconds pass; returns whether it came up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5):
+                return True
+        except urllib.error.HTTPError:
+            return True  # Any HTTP response means the server is listening
+        except OSError:
+            time.sleep(0.1)
+    return False
+
 def start_api_server():
     """Start the FastAPI server"""
     print("🚀 Starting FinanceFlow API server...")
@@ -30,7 +47,6 @@ def start_api_server():
 def start_dashboard():
     """Start the Streamlit dashboard"""
     print("📊 Starting FinanceFlow Dashboard...")
-    time.sleep(3)  # Wait for API to start
     try:
         subprocess.run([
             sys.executable, "-m", "streamlit", 
@@ -73,9 +89,10 @@ def main():
         api_thread = Thread(target=start_api_server, daemon=True)
         api_thread.start()
         
-        # Wait a moment for API to initialize
+        # Wait until the API answers instead of a fixed delay
         print("\n⏳ Waiting for API to initialize...")
-        time.sleep(5)
+        if not wait_ready(API_URL):
+            print("⚠️ API did not respond within 30 seconds; starting dashboard anyway")
         
         # Open dashboard in browser
         print("🌐 Opening dashboard in browser...")
@@ -1,4 +1,13 @@
 import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+
+@st.cache_resource
+def http():
+    """Keep-alive session reused across reruns, so each status check skips the TCP handshake"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return session
 
 st.title("🚀 FinanceFlow Test Dashboard")
 st.write("If you can see this, Streamlit is working!")
@@ -10,8 +19,8 @@ st.markdown("---")
 st.write("API Status: Testing connection to http://localhost:8000")
 
 try:
-    import requests
-    response = requests.get("http://localhost:8000", timeout=5)
+    # Fail fast on connect when the API is down, but allow a slow first response
+    response = http().get("http://localhost:8000", timeout=(0.2, 2.0))
     if response.status_code == 200:
         st.success("✅ API Connection Successful!")
         st.json(response.json())
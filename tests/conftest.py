@@ -0,0 +1,216 @@
+import os
+
+import pytest
+from tests.helpers import TEST_PASSWORD
+
+# app, passlib and SQLAlchemy are imported inside the session fixtures below,
+# so collection (e.g. `pytest --collect-only` or `-k` selections) never pays for them
+
+# Create test database in memory; StaticPool keeps every session (and the
+# threadpool the app runs sync dependencies in) on the one connection that holds it.
+# TEST_DATABASE_URL points the suite at an on-disk SQLite file instead.
+SQLALCHEMY_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "sqlite:///:memory:")
+IN_MEMORY = SQLALCHEMY_DATABASE_URL.endswith(":memory:")
+
+# Test data is thrown away, so an on-disk database can skip every fsync
+TEST_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _test_database_url():
+    """The test database URL; under pytest-xdist each worker gets its own file
+    (test_gw0.db, ...), so no two workers ever race on create_all or cleanup"""
+    from sqlalchemy.engine import make_url
+
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if IN_MEMORY or not worker:
+        return url
+    root, ext = os.path.splitext(url.database)
+    return url.set(database=f"{root}_{worker}{ext}")
+
+
+def _remove_db_files(url):
+    """Delete an on-disk test database along with its journal and WAL files"""
+    if IN_MEMORY:
+        return
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(url.database + suffix):
+            os.remove(url.database + suffix)
+
+
+# pysqlite defers BEGIN until the first write, so a SAVEPOINT would open (and
+# its RELEASE commit) a transaction of its own; emit BEGIN ourselves instead.
+# aiosqlite wraps the same sqlite3 module, so both engines need this.
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    if IN_MEMORY:
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in TEST_SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+def _listen(sync_engine):
+    from sqlalchemy import event
+
+    event.listen(sync_engine, "connect", _disable_pysqlite_transactions)
+    event.listen(sync_engine, "connect", _set_pragmas)
+    event.listen(sync_engine, "begin", _emit_begin)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Sync engine behind get_db, on a freshly cleaned test database"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    url = _test_database_url()
+    # Start from a clean file; a leftover journal or WAL would replay old rows
+    _remove_db_files(url)
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **({"poolclass": StaticPool} if IN_MEMORY else {})
+    )
+    _listen(engine)
+    yield engine
+    engine.dispose()
+    _remove_db_files(url)
+
+
+@pytest.fixture(scope="session")
+async def async_engine(engine):
+    """aiosqlite engine behind get_async_db; in memory it holds a database of its
+    own, on disk it shares the file with the sync engine"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    async_engine = create_async_engine(
+        engine.url.set(drivername="sqlite+aiosqlite"),
+        connect_args={"check_same_thread": False},
+        **({"poolclass": StaticPool} if IN_MEMORY else {})
+    )
+    _listen(async_engine.sync_engine)
+    yield async_engine
+    await async_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def password_hash(app):
+    """Hash of TEST_PASSWORD, computed once; seeded users share it instead of paying bcrypt each"""
+    from app.auth import get_password_hash
+
+    return get_password_hash(TEST_PASSWORD)
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The FastAPI app, imported on first use rather than at collection.
+
+    Importing app.main builds every router and the app itself; collection
+    no longer pays for it.
+    """
+    from passlib.context import CryptContext
+    from app import auth
+    from app.main import app
+
+    # Minimum bcrypt cost for the test session (2**4 rounds instead of 2**12),
+    # set before any test hashes a password. Production hashing is untouched.
+    auth.pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto")
+    return app
+
+
+@pytest.fixture(scope="session")
+async def client(app, engine, async_engine):
+    """One async client per test session, with the schema created once.
+
+    Requests go straight to the ASGI app through httpx, without the thread
+    portal the sync TestClient sets up for every call. Keep this fixture
+    session-scoped: a client per test would repeat the setup and warm-up below.
+    """
+    from httpx import ASGITransport, AsyncClient
+    from app import models
+
+    models.Base.metadata.create_all(bind=engine)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        # Starlette builds the middleware stack on the first request; do it
+        # here instead of inside whichever test happens to run first
+        await c.get("/openapi.json")
+        yield c
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def db_session(app, client, engine):
+    """Session wrapped in an outer transaction that is rolled back after the test.
+
+    Every request in the test gets this one session through get_db, and handler
+    commits only release a SAVEPOINT, so rows seeded or created during the test
+    never outlive it.
+    """
+    from sqlalchemy.orm import Session
+    from app.database import get_db
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Every test rolls back, so nothing relies on attributes expiring after commit
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint"
+    )
+
+    def override():
+        yield session
+
+    app.dependency_overrides[get_db] = override
+    yield session
+    del app.dependency_overrides[get_db]
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(autouse=True)
+async def async_db_session(app, client, async_engine):
+    """AsyncSession counterpart of db_session, served through get_async_db.
+
+    Same outer-transaction/SAVEPOINT arrangement, so the transaction endpoints'
+    balance UPDATEs are rolled back after each test as well.
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.database import get_async_db
+
+    connection = await async_engine.connect()
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+
+    async def override():
+        yield session
+
+    app.dependency_overrides[get_async_db] = override
+    yield session
+    del app.dependency_overrides[get_async_db]
+    await session.close()
+    await transaction.rollback()
+    await connection.close()
@@ -0,0 +1,3 @@
+"""Constants shared by the test modules (conftest is not imported directly)"""
+
+TEST_PASSWORD = "testpass"
@@ -1,86 +1,51 @@
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.main import app
-from app.database import get_db
-from app import models
-
-# Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create test tables
-models.Base.metadata.create_all(bind=engine)
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-client = TestClient(app)
-
-
-def test_register_user():
-    response = client.post(
-        "/auth/register",
-        json={"username": "testuser", "email": "test@example.com", "password": "testpassword"}
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert data["username"] == "testuser"
-    assert data["email"] == "test@example.com"
-    assert "id" in data
-
-
-def test_register_duplicate_user():
-    # First registration
-    client.post(
-        "/auth/register",
-        json={"username": "duplicate", "email": "duplicate@example.com", "password": "password"}
-    )
-    
-    # Second registration with same username
-    response = client.post(
-        "/auth/register",
-        json={"username": "duplicate", "email": "other@example.com", "password": "password"}
-    )
-    assert response.status_code == 400
-
-
-def test_login():
-    # Register user first
-    client.post(
-        "/auth/register",
-        json={"username": "logintest", "email": "login@example.com", "password": "testpass"}
-    )
-    
-    # Login
-    response = client.post(
-        "/auth/token",
-        data={"username": "logintest", "password": "testpass"}
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert "access_token" in data
-    assert data["token_type"] == "bearer"
-
-
-def test_login_wrong_password():
-    # Register user first
-    client.post(
-        "/auth/register",
-        json={"username": "wrongpass", "email": "wrong@example.com", "password": "correctpass"}
-    )
-    
-    # Login with wrong password
-    response = client.post(
-        "/auth/token",
-        data={"username": "wrongpass", "password": "wrongpass"}
-    )
-    assert response.status_code == 401
+from tests.helpers import TEST_PASSWORD
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def registered_user(db_session, password_hash):
+    from app import models
+
+    # Seed the user with the shared precomputed hash instead of registering
+    user = models.User(username="existing", email="existing@example.com", hashed_password=password_hash)
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+# Registration calls the path operation directly with the test session; login
+# goes over HTTP and doubles as the integration smoke check
+AUTH_CASES = [
+    pytest.param("register", {"username": "testuser", "email": "test@example.com", "password": "testpassword"}, 200, id="register"),
+    pytest.param("register", {"username": "existing", "email": "other@example.com", "password": "password"}, 400, id="duplicate"),
+    pytest.param("login", {"username": "existing", "password": TEST_PASSWORD}, 200, id="login_ok"),
+    pytest.param("login", {"username": "existing", "password": "wrongpass"}, 401, id="login_bad"),
+]
+
+
+@pytest.mark.parametrize("action,payload,expected", AUTH_CASES)
+async def test_auth_flow(client, db_session, registered_user, action, payload, expected):
+    if action == "register":
+        from fastapi import HTTPException
+        from app import schemas
+        from app.routers.auth import register_user
+
+        try:
+            user = await register_user(schemas.UserCreate(**payload), db=db_session)
+        except HTTPException as exc:
+            assert exc.status_code == expected
+            return
+        assert expected == 200
+        assert user.username == payload["username"]
+        assert user.email == payload["email"]
+        assert user.id is not None
+    else:
+        response = await client.post("/auth/token", data=payload)
+        assert response.status_code == expected
+        if expected == 200:
+            data = orjson.loads(response.content)
+            assert "access_token" in data
+            assert data["token_type"] == "bearer"
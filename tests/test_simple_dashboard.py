@@ -0,0 +1,41 @@
+import importlib
+import os
+
+import pytest
+
+# The autouse DB fixtures in conftest are async, so the tests run under anyio too
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def simple_dashboard(tmp_path_factory):
+    """simple_dashboard imported against a throwaway copy of its database.
+
+    The module runs init_db() at import, so import from an empty directory and
+    then pin DB_PATH there; the tracked simple_finance.db is never touched.
+    """
+    pytest.importorskip("streamlit")
+    db_dir = tmp_path_factory.mktemp("simple_dashboard")
+    cwd = os.getcwd()
+    os.chdir(db_dir)
+    try:
+        module = importlib.import_module("simple_dashboard")
+    finally:
+        os.chdir(cwd)
+    module.DB_PATH = str(db_dir / "simple_finance.db")
+    return module
+
+
+@pytest.mark.parametrize("term", ["latte", "LATTE", "café", "CAFÉ", "CAFÉ Latte"])
+async def test_search_ignores_case_beyond_ascii(simple_dashboard, term):
+    simple_dashboard.add_transactions_bulk([
+        (1, 4.5, "CAFÉ Latte", "expense", "2024-01-15"),
+        (1, 60.0, "Groceries", "expense", "2024-01-16"),
+        (1, 12.0, None, "expense", "2024-01-17"),
+    ])
+    try:
+        found = simple_dashboard.get_transactions_filtered(1, search=term)
+        assert list(found["description"]) == ["CAFÉ Latte"]
+    finally:
+        with simple_dashboard.get_conn() as conn:
+            conn.execute("DELETE FROM transactions")
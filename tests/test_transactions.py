@@ -0,0 +1,152 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def account(async_db_session, password_hash):
+    from app import models
+
+    # Seed the user and account straight into the async test database
+    user = models.User(username="txuser", email="tx@example.com", hashed_password=password_hash)
+    async_db_session.add(user)
+    await async_db_session.flush()
+    account = models.Account(name="Checking", account_type="checking", balance=0.0, user_id=user.id)
+    async_db_session.add(account)
+    await async_db_session.flush()
+    return account
+
+
+@pytest.fixture
+def auth_headers(account):
+    from app.auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'txuser'})}"}
+
+
+async def _balance(session, account_id):
+    from sqlalchemy import select
+    from app import models
+
+    return await session.scalar(select(models.Account.balance).where(models.Account.id == account_id))
+
+
+async def test_transaction_balance_follows_create_update_delete(client, async_db_session, account, auth_headers):
+    response = await client.post(
+        "/transactions/",
+        json={
+            "amount": 100.0,
+            "description": "Salary",
+            "transaction_date": "2024-01-15T00:00:00",
+            "transaction_type": "income",
+            "account_id": account.id
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    transaction_id = response.json()["id"]
+    assert await _balance(async_db_session, account.id) == 100.0
+    
+    # Same account: the net change is applied
+    response = await client.put(f"/transactions/{transaction_id}", json={"amount": 40.0}, headers=auth_headers)
+    assert response.status_code == 200
+    assert await _balance(async_db_session, account.id) == 40.0
+    
+    # Flipping the type reverses the sign of the effect
+    response = await client.put(f"/transactions/{transaction_id}", json={"transaction_type": "expense"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert await _balance(async_db_session, account.id) == -40.0
+    
+    response = await client.delete(f"/transactions/{transaction_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert await _balance(async_db_session, account.id) == 0.0
+    
+    response = await client.get(f"/transactions/{transaction_id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.fixture
+async def spending(async_db_session, account):
+    """A month of seeded activity: one income, three categorized expenses
+    (one above twice the expense average) and one uncategorized expense"""
+    from datetime import datetime, timedelta
+    from app import models
+
+    food = models.Category(name="Food", category_type="expense")
+    electronics = models.Category(name="Electronics", category_type="expense")
+    async_db_session.add_all([food, electronics])
+    await async_db_session.flush()
+    
+    now = datetime.utcnow()
+    rows = [
+        (1000.0, "Salary", "income", None, now - timedelta(days=1)),
+        (20.0, "Coffee", "expense", food.id, now - timedelta(days=2)),
+        (20.0, "Lunch", "expense", food.id, now - timedelta(days=3)),
+        (25.0, "Misc", "expense", None, now - timedelta(days=4)),
+        (200.0, "TV", "expense", electronics.id, now - timedelta(days=5)),
+    ]
+    async_db_session.add_all([
+        models.Transaction(
+            amount=amount,
+            description=description,
+            transaction_type=transaction_type,
+            category_id=category_id,
+            transaction_date=transaction_date,
+            account_id=account.id,
+            user_id=account.user_id
+        )
+        for amount, description, transaction_type, category_id, transaction_date in rows
+    ])
+    await async_db_session.flush()
+    return [row for row in rows if row[2] == "expense"]
+
+
+async def test_summary_totals(client, spending, auth_headers):
+    response = await client.get("/transactions/summary/", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "total_income": 1000.0,
+        "total_expenses": 265.0,
+        "net_income": 735.0,
+        "transaction_count": 5
+    }
+
+
+async def test_spending_patterns(client, spending, auth_headers):
+    import calendar
+
+    response = await client.get("/transactions/analytics/spending-patterns", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    
+    # Weekday names come from SQLite's strftime('%w') codes
+    expected_days = {calendar.day_name[day.weekday()]: amount for amount, _, _, _, day in spending}
+    assert {day: pattern["total_spent"] for day, pattern in data["weekly_patterns"].items()} == expected_days
+    
+    expected_months = {}
+    for amount, _, _, _, day in spending:
+        expected_months[day.strftime("%Y-%m")] = expected_months.get(day.strftime("%Y-%m"), 0) + amount
+    assert data["monthly_trends"] == expected_months
+    
+    # Average expense is 66.25, so only the 200.0 purchase is above twice that
+    anomalies = data["anomaly_detection"]
+    assert anomalies["high_spending_threshold"] == 132.5
+    assert anomalies["total_anomalies"] == 1
+    assert [a["description"] for a in anomalies["anomalous_transactions"]] == ["TV"]
+
+
+async def test_wealth_insights_distribution(client, spending, auth_headers):
+    response = await client.get(
+        "/transactions/analytics/wealth-insights", params={"period_days": 30}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_income"] == 1000.0
+    assert data["total_expenses"] == 265.0
+    # The NULL-category expense lands in the outer-joined "Uncategorized" bucket
+    distribution = {category: entry["amount"] for category, entry in data["spending_distribution"].items()}
+    assert distribution == {"Food": 40.0, "Electronics": 200.0, "Uncategorized": 25.0}
+    assert data["insights"]["top_expense_category"] == "Electronics"
+    # Savings rate 0.735, three categories, and 4 distinct amounts across 5
+    # transactions (consistency 20): int(29.4 + 9 + 6)
+    assert data["financial_health_score"] == 44